@@ -1,14 +1,18 @@
 from fastapi import FastAPI, Depends
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 from routing_osm import generate_osm_route
 from pydantic import BaseModel
 from datetime import datetime
 from models import ResourceInventory
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from database import SessionLocal, engine
 from models import Base, Village, Disease, OutbreakReport
+import instrumentation
+import export_data
+from scoring import compute_positivity_rate, compute_spread_velocity, compute_risk_score
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -28,6 +32,9 @@ app.add_middleware(
     allow_headers=["*"],        # allow any headers
 )
 
+# Timing / query / profiling hooks (off unless METRICS_ENABLED or PROFILE_REQUESTS)
+instrumentation.setup(app, engine)
+
 # ----------------------------
 # DB Dependency
 # ----------------------------
@@ -86,9 +93,8 @@ def ingest(
             return {"error": f"Disease {report.disease_id} not found"}
 
         # 3️⃣ Positivity rate
-        positivity_rate = (
-            report.positive_cases / report.tests_done
-            if report.tests_done > 0 else 0
+        positivity_rate = compute_positivity_rate(
+            report.tests_done, report.positive_cases
         )
 
         # 4️⃣ Fetch last report
@@ -103,35 +109,20 @@ def ingest(
         )
 
         # 5️⃣ Spread velocity
-        if last_report and last_report.positive_cases > 0:
-            spread_velocity = (
-                (report.positive_cases - last_report.positive_cases)
-                / last_report.positive_cases
-            )
-        else:
-            spread_velocity = 0.0
-
-        spread_velocity = max(spread_velocity, -1.0)
+        spread_velocity = compute_spread_velocity(
+            report.positive_cases,
+            last_report.positive_cases if last_report else None
+        )
 
         # 6️⃣ Risk scoring
-        normalized_population = village.population / 10000
-
-        W1 = 0.30
-        W2 = 0.25
-        W3 = 0.20
-        W4 = 0.15
-        W5 = 0.10
-
-        risk_score = (
-            (W1 * positivity_rate) +
-            (W2 * spread_velocity) +
-            (W3 * village.vulnerability_index) +
-            (W4 * normalized_population) +
-            (W5 * disease.severity_weight)
+        risk_score = compute_risk_score(
+            positivity_rate,
+            spread_velocity,
+            village.vulnerability_index,
+            village.population,
+            disease.severity_weight
         )
 
-        risk_score = max(risk_score, 0.0)
-
         # 7️⃣ Insert record
         outbreak = OutbreakReport(
             village_id=report.village_id,
@@ -221,56 +212,6 @@ def priority_ranking(db: Session = Depends(get_db)):
     ]
 
 
-# ----------------------------
-# Mock Data Seeder
-# ----------------------------
-
-@app.on_event("startup")
-def seed_mock_data():
-    db = SessionLocal()
-
-    # Skip if already seeded
-    if db.query(Village).first():
-        db.close()
-        return
-
-    # ----------------------------
-    # 1️⃣ Diseases
-    # ----------------------------
-    diseases = [
-        Disease(id=1, name="Malaria", severity_weight=1.5),
-        Disease(id=2, name="Dengue", severity_weight=1.8),
-        Disease(id=3, name="Cholera", severity_weight=2.0),
-    ]
-    db.add_all(diseases)
-
-    # ----------------------------
-    # 2️⃣ Villages (clustered ~5km)
-    # ----------------------------
-    villages = [
-        Village(id=1, name="Kothapet", latitude=17.123, longitude=78.456, population=2000, vulnerability_index=0.6),
-        Village(id=2, name="Ramnagar", latitude=17.130, longitude=78.462, population=1500, vulnerability_index=0.5),
-        Village(id=3, name="Lakshmipur", latitude=17.118, longitude=78.450, population=1800, vulnerability_index=0.7),
-        Village(id=4, name="Shantinagar", latitude=17.135, longitude=78.470, population=2200, vulnerability_index=0.4),
-    ]
-    db.add_all(villages)
-
-    # ----------------------------
-    # 3️⃣ Resource Inventory
-    # ----------------------------
-    inventory = ResourceInventory(
-        doctors_available=6,
-        nurses_available=4,
-        malaria_kits=300,
-        dengue_kits=200,
-        cholera_kits=150,
-        vaccines=500
-    )
-    db.add(inventory)
-
-    db.commit()
-    db.close()
-
 @app.get("/admin/batch/{batch_id}")
 def get_batch(batch_id: int, db: Session = Depends(get_db)):
 
@@ -436,4 +377,43 @@ def get_villages(db: Session = Depends(get_db)):
 
 @app.get("/diseases")
 def get_diseases(db: Session = Depends(get_db)):
-    return db.query(Disease).all()
\ No newline at end of file
+    return db.query(Disease).all()
+
+
+# ----------------------------
+# Streaming Export
+# ----------------------------
+@app.get("/admin/export/{table}")
+def export_table(
+    table: str,
+    format: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    village_ids: Optional[str] = None
+):
+
+    if table not in export_data.EXPORT_TABLES:
+        return {"error": f"Unknown table {table}"}
+
+    if format not in export_data.FORMATS:
+        return {"error": f"Unknown format {format}"}
+
+    if format != "ndjson" and export_data.pa is None:
+        return {"error": "pyarrow is required for arrow/parquet export"}
+
+    try:
+        village_id_list = export_data.parse_village_ids(village_ids)
+    except ValueError:
+        return {"error": f"Invalid village_ids {village_ids}"}
+
+    # Streams in chunks on its own connection; never loads the whole table
+    return StreamingResponse(
+        export_data.export_stream(
+            engine, table, format,
+            start=start,
+            end=end,
+            village_ids=village_id_list
+        ),
+        media_type=export_data.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'}
+    )
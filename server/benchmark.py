@@ -0,0 +1,429 @@
+#benchmark.py
+#
+# End-to-end benchmark. Drives the FastAPI app in-process (TestClient)
+# against synthetic databases of several sizes and writes p50/p99 latency
+# and throughput per endpoint as JSON.
+#
+#   python benchmark.py --sizes 1000,10000,100000
+#   python benchmark.py --sizes 1000 --compare bench_results/previous.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import time
+from datetime import datetime
+
+import networkx as nx
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# app.py runs create_all on import; point it at a throwaway in-memory DB so
+# no health.db is left wherever the benchmark is launched from
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import instrumentation
+import routing_osm
+import seed_data
+from app import app, get_db
+from models import (
+    Village, RoadSegment, ResourceInventory, AllocationBatch, AllocationDetail,
+    OutbreakReport,
+)
+
+# Fixed so that every run benchmarks byte-identical data
+DEFAULT_END_DATE = "2026-01-01"
+
+# Bump when seed_data output changes so stale cached databases are rebuilt
+CACHE_VERSION = 3
+
+# p99 of fewer samples than this is just the max
+MIN_P99_SAMPLES = 100
+
+# Warm-ups stop after a call slower than this
+SLOW_CALL_S = 1.0
+
+# perf_counter() deadline for the endpoint being measured; SQLite queries
+# still running past it are interrupted
+_deadline = [None]
+
+
+# ----------------------------
+# Stats
+# ----------------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(latencies, items_per_request=1):
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    if not count:
+        return {
+            "requests": 0, "p50_ms": None, "p99_ms": None, "mean_ms": None,
+            "max_ms": None, "serial_rps": None, "serial_items_per_sec": None,
+        }
+
+    mean = sum(latencies) / count
+    return {
+        "requests": count,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if count >= MIN_P99_SAMPLES else None,
+        "mean_ms": round(mean * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        # Calls are issued one at a time, so throughput is 1 / mean latency
+        "serial_rps": round(1 / mean, 2),
+        "serial_items_per_sec": round(items_per_request / mean, 2),
+    }
+
+
+def measure(call, iterations, warmup, budget, before=None, items_per_request=1):
+    """Runs call() warmup + iterations times. before() runs untimed ahead of
+    every call, for resetting state the endpoint consumes. Stops once
+    `budget` seconds have passed, interrupting a DB query still in flight,
+    and marks the result as truncated. Warm-ups end early after a slow call."""
+
+    latencies = []
+    timed_out = False
+    deadline = time.perf_counter() + budget
+    warmups_left = warmup
+
+    while len(latencies) < iterations:
+        if time.perf_counter() >= deadline:
+            timed_out = True
+            break
+        if before:
+            before()
+
+        _deadline[0] = deadline
+        start = time.perf_counter()
+        try:
+            response = call()
+        except OperationalError as exc:
+            if "interrupted" not in str(exc):
+                raise
+            timed_out = True
+            break
+        finally:
+            _deadline[0] = None
+        took = time.perf_counter() - start
+
+        if response.status_code != 200 or "error" in response.json():
+            raise RuntimeError(f"{response.request.url}: {response.status_code} {response.text[:200]}")
+
+        if warmups_left:
+            warmups_left -= 1
+            # Once a call takes this long, cache warm-up no longer matters
+            if took > SLOW_CALL_S:
+                warmups_left = 0
+            continue
+        latencies.append(took)
+
+    stats = summarize(latencies, items_per_request)
+    stats["truncated"] = len(latencies) < iterations
+    stats["timed_out"] = timed_out
+    stats["budget_s"] = budget
+    return stats
+
+
+def _check_deadline():
+    return 1 if _deadline[0] is not None and time.perf_counter() > _deadline[0] else 0
+
+
+# ----------------------------
+# Fixtures
+# ----------------------------
+def prepare_database(path, villages, args):
+    """Generates the synthetic database once and reuses it on later runs.
+    The benchmark writes (ingest, allocation), so it runs on a fresh copy."""
+
+    if args.regenerate or not os.path.exists(path):
+        print(f"Generating {villages} villages -> {path}", flush=True)
+        engine = create_engine(f"sqlite:///{path}")
+        seed_data.generate(
+            engine,
+            villages=villages,
+            months=args.months,
+            interval_days=args.interval_days,
+            seed=args.seed,
+            end_time=datetime.strptime(args.end_date, "%Y-%m-%d"),
+            reset=True,
+        )
+        engine.dispose()
+
+    run_path = path.replace(".db", ".run.db")
+    shutil.copyfile(path, run_path)
+
+    engine = create_engine(f"sqlite:///{run_path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _install_deadline(dbapi_conn, _):
+        dbapi_conn.set_progress_handler(_check_deadline, 10000)
+
+    # app.py hooked its own (unused here) engine; hook the one requests hit
+    if instrumentation.METRICS_ENABLED:
+        instrumentation.instrument_engine(engine)
+
+    return engine
+
+
+def build_road_graph(db):
+    """Routing graph built from the synthetic RoadSegments, so routing can be
+    benchmarked without downloading OSM data."""
+
+    graph = nx.MultiDiGraph(crs="epsg:4326")
+
+    for v in db.query(Village.id, Village.latitude, Village.longitude):
+        graph.add_node(v.id, x=v.longitude, y=v.latitude)
+
+    for s in db.query(RoadSegment.from_village_id, RoadSegment.to_village_id, RoadSegment.distance_km):
+        graph.add_edge(s.from_village_id, s.to_village_id, length=s.distance_km * 1000)
+        graph.add_edge(s.to_village_id, s.from_village_id, length=s.distance_km * 1000)
+
+    if not nx.is_weakly_connected(graph):
+        raise RuntimeError("Road network is disconnected; rerun with --regenerate")
+
+    return graph
+
+
+def make_route_batch(db, source_batch_id, stops):
+    """Copies the top allocations of a batch into a new batch capped at
+    `stops` villages; the greedy nearest-neighbour route is quadratic in
+    batch size, so full district batches are impractical to route. Without a
+    source batch (allocation ran out of budget) the highest-risk villages
+    are used instead."""
+
+    if source_batch_id is not None:
+        village_scores = (
+            db.query(AllocationDetail.village_id, AllocationDetail.priority_score)
+            .filter(AllocationDetail.batch_id == source_batch_id)
+            .order_by(AllocationDetail.priority_score.desc())
+            .limit(stops)
+            .all()
+        )
+    else:
+        top_risk = func.max(OutbreakReport.risk_score)
+        village_scores = (
+            db.query(OutbreakReport.village_id, top_risk)
+            .group_by(OutbreakReport.village_id)
+            .order_by(top_risk.desc())
+            .limit(stops)
+            .all()
+        )
+
+    batch = AllocationBatch(mode="benchmark", total_villages_selected=len(village_scores))
+    db.add(batch)
+    db.flush()
+
+    db.add_all([
+        AllocationDetail(
+            batch_id=batch.id,
+            village_id=village_id,
+            doctors_allocated=1,
+            nurses_allocated=0,
+            malaria_kits_allocated=10,
+            dengue_kits_allocated=0,
+            priority_score=score,
+        )
+        for village_id, score in village_scores
+    ])
+    db.commit()
+
+    return batch.id
+
+
+# ----------------------------
+# Benchmark one database size
+# ----------------------------
+def run_size(villages, args):
+    path = os.path.join(
+        args.data_dir,
+        f"bench_{villages}_m{args.months}_i{args.interval_days}_s{args.seed}"
+        f"_{args.end_date}_v{CACHE_VERSION}.db"
+    )
+    engine = prepare_database(path, villages, args)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    rng = random.Random(args.seed)
+
+    with Session() as db:
+        inventory = db.query(ResourceInventory).first()
+        start_inventory = (inventory.doctors_available, inventory.malaria_kits)
+        report_count = client.get("/admin/dashboard").json()["total_reports"]
+
+    def reset_inventory():
+        with Session() as db:
+            inventory = db.query(ResourceInventory).first()
+            inventory.doctors_available, inventory.malaria_kits = start_inventory
+            db.commit()
+
+    def ingest_payload():
+        return [
+            {
+                "village_id": rng.randint(1, villages),
+                "disease_id": rng.randint(1, len(seed_data.DISEASES)),
+                "tests_done": rng.randint(10, 200),
+                "positive_cases": rng.randint(0, 10),
+            }
+            for _ in range(args.ingest_batch)
+        ]
+
+    results = {"villages": villages, "reports": report_count}
+    print(f"[{villages} villages, {report_count} reports]", flush=True)
+
+    results["/ingest"] = measure(
+        lambda: client.post("/ingest", json=ingest_payload()),
+        args.iterations, args.warmup, args.time_budget, items_per_request=args.ingest_batch
+    )
+
+    for endpoint in ("/admin/priority-ranking", "/admin/heatmap"):
+        results[endpoint] = measure(
+            lambda: client.get(endpoint), args.iterations, args.warmup, args.time_budget
+        )
+
+    batch_ids = []
+
+    def allocate():
+        response = client.post("/admin/run-allocation")
+        batch_ids.append(response.json().get("batch_id"))
+        return response
+
+    results["/admin/run-allocation"] = measure(
+        allocate, args.iterations, args.warmup, args.time_budget, before=reset_inventory
+    )
+    reset_inventory()
+
+    with Session() as db:
+        graph_start = time.perf_counter()
+        routing_osm.G = build_road_graph(db)
+        results["road_graph_build_s"] = round(time.perf_counter() - graph_start, 3)
+        route_batch_id = make_route_batch(
+            db, batch_ids[-1] if batch_ids else None, args.route_stops
+        )
+
+    results["/admin/generate-route/{batch_id}"] = measure(
+        lambda: client.post(f"/admin/generate-route/{route_batch_id}"),
+        args.route_iterations, 0, args.time_budget
+    )
+    results["/admin/generate-route/{batch_id}"]["stops"] = args.route_stops
+
+    routing_osm.G = None
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"  {name:<36} n={stats['requests']:<4} p50 {_ms(stats['p50_ms'])}  "
+                  f"p99 {_ms(stats['p99_ms'])}  {stats['serial_rps'] or 0:>8.2f} req/s"
+                  f"{'  (cut short by time budget)' if stats['timed_out'] else ''}", flush=True)
+
+    return results
+
+
+def _ms(value):
+    return f"{value:>10.2f} ms" if value is not None else f"{'-':>10}   "
+
+
+# ----------------------------
+# Comparison
+# ----------------------------
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nChange vs {baseline_path} (positive = slower)")
+    for size, result in current["results"].items():
+        previous = baseline.get("results", {}).get(size)
+        if not previous:
+            continue
+        for name, stats in result.items():
+            old = previous.get(name)
+            if not isinstance(stats, dict) or not isinstance(old, dict):
+                continue
+            deltas = [
+                f"{key} {(stats[key] - old[key]) / old[key] * 100:+.1f}%"
+                for key in ("p50_ms", "p99_ms")
+                if old.get(key) and stats.get(key) is not None
+            ]
+            print(f"  {size:>7} {name:<36} {'  '.join(deltas)}")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, ranking, allocation and routing")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated village counts")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--interval-days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default=DEFAULT_END_DATE)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--ingest-batch", type=int, default=50, help="Reports per /ingest request")
+    parser.add_argument("--route-stops", type=int, default=15, help="Villages per routed batch")
+    parser.add_argument("--route-iterations", type=int, default=3)
+    parser.add_argument("--time-budget", type=float, default=60,
+                        help="Seconds per endpoint per size; longer runs are cut short")
+    parser.add_argument("--data-dir", default="bench_data")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild cached databases")
+    parser.add_argument("--output", help="JSON results path (default: bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    output = args.output or os.path.join(
+        "bench_results", f"benchmark-{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+        "results": {},
+    }
+
+    # Written after every size, so finished sizes survive a long or aborted run
+    for size in sizes:
+        report["results"][str(size)] = run_size(size, args)
+        with open(output + ".tmp", "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(output + ".tmp", output)
+        print(f"Results written to {output}", flush=True)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 #database.py
 
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./health.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./health.db")
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
@@ -0,0 +1,377 @@
+#export_data.py
+#
+# Streaming export / import of outbreak history and allocation results.
+# Rows are read in keyset-paginated chunks and written out chunk by chunk,
+# so memory stays constant however large the tables get.
+#
+#   python export_data.py export outbreak_reports --format parquet --out reports.parquet \
+#       --start 2026-01-01 --end 2026-04-01 --villages 1,2,3
+#   python export_data.py export all --format parquet --out-dir analysis/
+#   python export_data.py import analysis/*.parquet --db sqlite:///./analysis.db
+#
+# Parquet / Arrow need pyarrow; NDJSON works without it.
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, create_engine, select
+
+import database
+from models import (
+    Base, Village, Disease, MobileUnit, OutbreakReport, AllocationBatch,
+    AllocationDetail, RoutePlan,
+)
+from seed_data import bulk_insert
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+CHUNK_SIZE = 10000
+FORMATS = ("ndjson", "arrow", "parquet")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+batches = AllocationBatch.__table__
+
+
+# ----------------------------
+# Exportable tables
+# ----------------------------
+# time: column the start/end filter applies to
+# village: column the village filter applies to
+# join: extra table outer-joined in for the time column
+EXPORT_TABLES = {
+    "outbreak_reports": {
+        "table": OutbreakReport.__table__,
+        "time": OutbreakReport.__table__.c.report_time,
+        "village": OutbreakReport.__table__.c.village_id,
+    },
+    "allocation_details": {
+        "table": AllocationDetail.__table__,
+        "time": batches.c.created_at,
+        "village": AllocationDetail.__table__.c.village_id,
+        "join": batches,
+    },
+    "route_plans": {
+        "table": RoutePlan.__table__,
+        "time": batches.c.created_at,
+        "village": None,   # filtered on the parsed route_sequence
+        "join": batches,
+    },
+    # Reference tables, so an analysis copy can be rebuilt from exports alone
+    "villages": {"table": Village.__table__, "village": Village.__table__.c.id},
+    "diseases": {"table": Disease.__table__},
+    "mobile_units": {"table": MobileUnit.__table__},
+    "allocation_batches": {"table": batches, "time": batches.c.created_at},
+}
+
+
+def _columns(spec):
+    columns = list(spec["table"].c)
+    if spec.get("join") is not None:
+        columns.append(spec["time"].label("batch_created_at"))
+    return columns
+
+
+def _arrow_type(column):
+    if column.name == "route_sequence":
+        return pa.list_(pa.int64())
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def arrow_schema(name):
+    return pa.schema([(c.name, _arrow_type(c)) for c in _columns(EXPORT_TABLES[name])])
+
+
+# ----------------------------
+# Chunked reads
+# ----------------------------
+def iter_chunks(conn, name, start=None, end=None, village_ids=None, chunk_size=CHUNK_SIZE):
+    """Yields lists of row dicts, chunk_size at a time, paging on the primary
+    key (WHERE id > last ORDER BY id) so each query stays cheap."""
+
+    spec = EXPORT_TABLES[name]
+    table = spec["table"]
+    query = select(*_columns(spec))
+
+    # Outer join: rows without a (valid) batch are still exported
+    if spec.get("join") is not None:
+        query = query.select_from(table.outerjoin(spec["join"]))
+    if start and spec.get("time") is not None:
+        query = query.where(spec["time"] >= start)
+    if end and spec.get("time") is not None:
+        query = query.where(spec["time"] < end)
+    if village_ids and spec.get("village") is not None:
+        query = query.where(spec["village"].in_(village_ids))
+
+    wanted = set(village_ids) if village_ids else None
+    last_id = None
+
+    while True:
+        page = query
+        if last_id is not None:
+            page = page.where(table.c.id > last_id)
+        rows = conn.execute(page.order_by(table.c.id).limit(chunk_size)).mappings().all()
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+
+        chunk = [dict(row) for row in rows]
+
+        if "route_sequence" in table.c:
+            for row in chunk:
+                if row["route_sequence"] is not None:
+                    row["route_sequence"] = json.loads(row["route_sequence"])
+            if wanted:
+                chunk = [row for row in chunk if wanted.intersection(row["route_sequence"] or ())]
+
+        if chunk:
+            yield chunk
+
+
+# ----------------------------
+# Encoders (each yields bytes)
+# ----------------------------
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def encode_ndjson(chunks):
+    for chunk in chunks:
+        yield "".join(
+            json.dumps(row, default=_json_default) + "\n" for row in chunk
+        ).encode()
+
+
+class _Drain:
+    """Write-only sink that hands back whatever was written since the last
+    drain, letting Arrow/Parquet writers stream instead of buffering."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _encode_arrow(chunks, schema, make_writer, write):
+    if pa is None:
+        raise RuntimeError("pyarrow is required for arrow/parquet export")
+
+    sink = _Drain()
+    writer = make_writer(sink, schema)
+    for chunk in chunks:
+        write(writer, pa.Table.from_pylist(chunk, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def encode_arrow(chunks, schema):
+    return _encode_arrow(chunks, schema, ipc.new_stream, lambda w, t: w.write_table(t))
+
+
+def encode_parquet(chunks, schema):
+    # One row group per chunk
+    return _encode_arrow(
+        chunks, schema,
+        lambda sink, s: pq.ParquetWriter(sink, s, compression="zstd"),
+        lambda w, t: w.write_table(t)
+    )
+
+
+def export_stream(engine, name, fmt="ndjson", start=None, end=None, village_ids=None,
+                  chunk_size=CHUNK_SIZE):
+    """Yields the encoded export of one table as bytes. Holds its own
+    connection for the lifetime of the stream."""
+
+    with engine.connect() as conn:
+        chunks = iter_chunks(conn, name, start, end, village_ids, chunk_size)
+
+        if fmt == "ndjson":
+            yield from encode_ndjson(chunks)
+        elif fmt == "arrow":
+            yield from encode_arrow(chunks, arrow_schema(name))
+        elif fmt == "parquet":
+            yield from encode_parquet(chunks, arrow_schema(name))
+        else:
+            raise ValueError(f"Unknown format {fmt}")
+
+
+# ----------------------------
+# Import
+# ----------------------------
+def _read_ndjson(path, chunk_size):
+    chunk = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _read_arrow(path, chunk_size):
+    with pa.memory_map(path) as source:
+        for batch in ipc.open_stream(source):
+            yield batch.to_pylist()
+
+
+def _read_parquet(path, chunk_size):
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+READERS = {".ndjson": _read_ndjson, ".arrow": _read_arrow, ".parquet": _read_parquet}
+
+
+def _to_db_rows(table, chunk):
+    names = [c.name for c in table.c]
+    datetime_columns = [c.name for c in table.c if isinstance(c.type, DateTime)]
+
+    for row in chunk:
+        out = {name: row.get(name) for name in names}
+        for name in datetime_columns:
+            if isinstance(out[name], str):
+                out[name] = datetime.fromisoformat(out[name])
+        if "route_sequence" in out and not isinstance(out["route_sequence"], (str, type(None))):
+            out["route_sequence"] = json.dumps(out["route_sequence"])
+        yield out
+
+
+def import_file(engine, path, name=None, chunk_size=CHUNK_SIZE):
+    """Bulk-loads one exported file. The table name defaults to the file name
+    stem (outbreak_reports.parquet -> outbreak_reports)."""
+
+    stem, ext = os.path.splitext(os.path.basename(path))
+    name = name or stem
+    if name not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table {name}")
+    if ext not in READERS:
+        raise ValueError(f"Unknown file type {ext}")
+    if ext != ".ndjson" and pa is None:
+        raise RuntimeError("pyarrow is required to import arrow/parquet files")
+
+    table = EXPORT_TABLES[name]["table"]
+    Base.metadata.create_all(bind=engine, tables=[table])
+
+    with engine.begin() as conn:
+        return sum(
+            bulk_insert(conn, table, _to_db_rows(table, chunk))
+            for chunk in READERS[ext](path, chunk_size)
+        )
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parse_village_ids(value):
+    return [int(v) for v in value.split(",") if v.strip()] if value else None
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def main():
+    db_help = "Database URL (default: DATABASE_URL or sqlite:///./health.db)"
+
+    # --db is accepted before or after the subcommand; SUPPRESS stops the
+    # subcommand default from overwriting a value given up front
+    db_option = argparse.ArgumentParser(add_help=False)
+    db_option.add_argument("--db", default=argparse.SUPPRESS, help=db_help)
+
+    parser = argparse.ArgumentParser(description="Export / import outbreak history")
+    parser.add_argument("--db", help=db_help)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", parents=[db_option])
+    export.add_argument("table", choices=list(EXPORT_TABLES) + ["all"])
+    export.add_argument("--format", choices=FORMATS, default="parquet")
+    export.add_argument("--out", help="Output file (single table)")
+    export.add_argument("--out-dir", default=".", help="Output directory (used with 'all')")
+    export.add_argument("--start", help="Inclusive start, ISO date/time")
+    export.add_argument("--end", help="Exclusive end, ISO date/time")
+    export.add_argument("--villages", type=parse_village_ids, help="Comma-separated village ids")
+    export.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    load = commands.add_parser("import", parents=[db_option])
+    load.add_argument("files", nargs="+")
+    load.add_argument("--table", help="Table name (default: file name stem)")
+    load.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    args = parser.parse_args()
+
+    # models.py already imported database.py, so build the engine directly
+    engine = create_engine(args.db) if args.db else database.engine
+
+    if args.command == "export":
+        names = list(EXPORT_TABLES) if args.table == "all" else [args.table]
+        os.makedirs(args.out_dir, exist_ok=True)
+
+        for name in names:
+            path = args.out if args.out and len(names) == 1 else os.path.join(
+                args.out_dir, f"{name}.{args.format}"
+            )
+            size = 0
+            with open(path, "wb") as f:
+                for data in export_stream(
+                    engine, name, args.format,
+                    start=parse_date(args.start),
+                    end=parse_date(args.end),
+                    village_ids=args.villages,
+                    chunk_size=args.chunk_size,
+                ):
+                    f.write(data)
+                    size += len(data)
+            print(f"{name}: {size} bytes -> {path}")
+
+    else:
+        for path in args.files:
+            count = import_file(engine, path, args.table, args.chunk_size)
+            print(f"{path}: {count} rows imported")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 from typing import TypedDict
 from langgraph.graph import StateGraph, END
+from instrumentation import span
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -12,7 +13,8 @@ model = genai.GenerativeModel("gemini-1.5-flash")
 
 
 def call_gemini(prompt: str) -> str:
-    response = model.generate_content(prompt)
+    with span("llm.gemini"):
+        response = model.generate_content(prompt)
     return response.text
 
 
@@ -0,0 +1,408 @@
+#instrumentation.py
+#
+# Request timing, DB query hooks, span timers and an opt-in sampling
+# profiler, exported in Prometheus text format from /metrics.
+#
+#   METRICS_ENABLED=1       timing middleware, query hooks and spans
+#   PROFILE_REQUESTS=1      sample the stacks of every request
+#   PROFILE_INTERVAL_MS=5   sampling interval
+#
+# With both switched off nothing is installed and span() returns a shared
+# no-op context manager.
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+
+
+def _flag(name):
+    return os.getenv(name, "").lower() in ("1", "true", "yes", "on")
+
+
+METRICS_ENABLED = _flag("METRICS_ENABLED")
+PROFILE_REQUESTS = _flag("PROFILE_REQUESTS")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_HISTORY = 20
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_request_stats = ContextVar("request_stats", default=None)
+_NOOP = nullcontext()
+
+
+# ----------------------------
+# Metric registry
+# ----------------------------
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}   # label_values -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, label_values=()):
+        with self.lock:
+            series = self.values.get(label_values)
+            if series is None:
+                series = self.values[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, series):
+                    le = _labels(self.labels + ("le",), label_values + (_format(bound),))
+                    lines.append(f"{self.name}_bucket{le} {count}")
+                le = _labels(self.labels + ("le",), label_values + ("+Inf",))
+                lines.append(f"{self.name}_bucket{le} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+
+def _format(value):
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+HTTP_DB_QUERIES = Histogram(
+    "http_request_db_queries", "DB queries issued per HTTP request.", ("route",), COUNT_BUCKETS)
+DB_QUERIES = Counter(
+    "db_queries_total", "DB queries executed.", ("operation",))
+DB_DURATION = Histogram(
+    "db_query_duration_seconds", "DB query latency.", ("operation",))
+SPAN_DURATION = Histogram(
+    "span_duration_seconds", "Time spent in instrumented stages.", ("span",))
+
+METRICS = [HTTP_REQUESTS, HTTP_DURATION, HTTP_DB_QUERIES, DB_QUERIES, DB_DURATION, SPAN_DURATION]
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Per-request accumulator
+# ----------------------------
+class RequestStats:
+    __slots__ = ("db_count", "db_time", "spans")
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.spans = {}
+
+    def server_timing(self, total):
+        parts = [f"total;dur={total * 1000:.1f}"]
+        # DB time is only measured when the engine hooks are installed
+        if METRICS_ENABLED:
+            parts.append(f"db;dur={self.db_time * 1000:.1f}")
+        parts += [f"{name};dur={t * 1000:.1f}" for name, t in self.spans.items()]
+        return ", ".join(parts)
+
+
+# ----------------------------
+# Span timers
+# ----------------------------
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        SPAN_DURATION.observe(elapsed, (self.name,))
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.spans[self.name] = stats.spans.get(self.name, 0.0) + elapsed
+        return False
+
+
+def span(name):
+    """Times a block: `with span("routing.dijkstra"): ...`"""
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+# ----------------------------
+# SQLAlchemy query hooks
+# ----------------------------
+# One start time per connection (queries on a connection never nest)
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    operation = statement.lstrip().split(None, 1)[0].upper()
+
+    DB_QUERIES.inc((operation,))
+    DB_DURATION.observe(elapsed, (operation,))
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_count += 1
+        stats.db_time += elapsed
+
+
+def _handle_error(context):
+    # after_cursor_execute doesn't run for failed statements
+    if context.connection is not None:
+        context.connection.info.pop("query_start", None)
+
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ----------------------------
+# Sampling profiler
+# ----------------------------
+class RequestProfile:
+    def __init__(self, profile_id, method, path):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.duration = None
+        self.samples = 0
+        self.stacks = {}
+
+    def collapsed(self):
+        """Folded stacks, one `frame;frame;frame count` per line
+        (flamegraph.pl / speedscope input)."""
+        rows = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return "\n".join(f"{stack} {count}" for stack, count in rows) + "\n"
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration else None,
+            "samples": self.samples,
+        }
+
+
+# Frames parked in these modules are idle threads, not request work
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+
+
+class Sampler:
+    """One background thread samples every thread's stack while at least one
+    profiled request is in flight. Samples go to all active profiles, so
+    concurrent requests share samples; profile on a quiet instance."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = set()
+        self.recent = deque(maxlen=PROFILE_HISTORY)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.next_id = 1
+        self.thread = None
+
+    def start(self, method, path):
+        with self.lock:
+            profile = RequestProfile(self.next_id, method, path)
+            self.next_id += 1
+            self.active.add(profile)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+        return profile
+
+    def stop(self, profile, duration):
+        profile.duration = duration
+        with self.lock:
+            self.active.discard(profile)
+            self.recent.append(profile)
+
+    def get(self, profile_id):
+        with self.lock:
+            for profile in self.recent:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+
+        while True:
+            # Clear under the lock so a start() racing with this check
+            # always leaves the event set
+            with self.lock:
+                idle = not self.active
+                if idle:
+                    self.wakeup.clear()
+            if idle:
+                self.wakeup.wait()
+                continue
+
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(names)))
+
+            with self.lock:
+                for profile in self.active:
+                    profile.samples += 1
+                    for stack in stacks:
+                        profile.stacks[stack] = profile.stacks.get(stack, 0) + 1
+
+            time.sleep(self.interval)
+
+
+sampler = Sampler(PROFILE_INTERVAL) if PROFILE_REQUESTS else None
+
+
+# ----------------------------
+# Timing middleware
+# ----------------------------
+class InstrumentationMiddleware:
+    """Plain ASGI middleware (no BaseHTTPMiddleware overhead). Records latency
+    and DB usage per route template and adds a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(("/metrics", "/debug/profiles")):
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        profile = sampler.start(scope["method"], scope["path"]) if sampler else None
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing(time.perf_counter() - start).encode()))
+                if profile:
+                    headers.append((b"x-profile-id", str(profile.id).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            if profile:
+                sampler.stop(profile, elapsed)
+
+            # Route template keeps label cardinality bounded (/admin/batch/{batch_id})
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+
+            HTTP_REQUESTS.inc((scope["method"], route, status[0]))
+            HTTP_DURATION.observe(elapsed, (scope["method"], route))
+            if METRICS_ENABLED:
+                HTTP_DB_QUERIES.observe(stats.db_count, (route,))
+
+
+# ----------------------------
+# Wiring
+# ----------------------------
+def setup(app, engine):
+    """Installs instrumentation on the app if switched on via environment."""
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/debug/profiles")
+    def list_profiles():
+        if not sampler:
+            return {"error": "Profiling disabled; set PROFILE_REQUESTS=1"}
+        with sampler.lock:
+            profiles = list(sampler.recent)
+        return [p.summary() for p in reversed(profiles)]
+
+    @app.get("/debug/profiles/{profile_id}")
+    def get_profile(profile_id: int):
+        profile = sampler.get(profile_id) if sampler else None
+        if not profile:
+            return {"error": "Profile not found"}
+        return PlainTextResponse(profile.collapsed())
+
+    if METRICS_ENABLED:
+        instrument_engine(engine)
+
+    if METRICS_ENABLED or PROFILE_REQUESTS:
+        app.add_middleware(InstrumentationMiddleware)
@@ -1,6 +1,7 @@
 import osmnx as ox
 import networkx as nx
 import os
+from instrumentation import span
 
 GRAPH_FILE = "roads.graphml"
 G = None
@@ -9,26 +10,29 @@ G = None
 def load_or_build_graph(center_lat, center_lon):
     global G
 
-    if os.path.exists(GRAPH_FILE):
-        G = ox.load_graphml(GRAPH_FILE)
-    else:
-        G = ox.graph_from_point(
-            (center_lat, center_lon),
-            dist=20000,           # 20km radius (adjust if needed)
-            network_type="drive"
-        )
-        ox.save_graphml(G, GRAPH_FILE)
+    with span("routing.graph_load"):
+        if os.path.exists(GRAPH_FILE):
+            G = ox.load_graphml(GRAPH_FILE)
+        else:
+            G = ox.graph_from_point(
+                (center_lat, center_lon),
+                dist=20000,           # 20km radius (adjust if needed)
+                network_type="drive"
+            )
+            ox.save_graphml(G, GRAPH_FILE)
 
 
 def nearest_node(lat, lon):
-    return ox.distance.nearest_nodes(G, lon, lat)
+    with span("routing.snap"):
+        return ox.distance.nearest_nodes(G, lon, lat)
 
 
 def road_distance(v1, v2):
     n1 = nearest_node(v1.latitude, v1.longitude)
     n2 = nearest_node(v2.latitude, v2.longitude)
 
-    return nx.shortest_path_length(G, n1, n2, weight="length")
+    with span("routing.dijkstra"):
+        return nx.shortest_path_length(G, n1, n2, weight="length")
 
 
 def generate_osm_route(villages):
@@ -0,0 +1,42 @@
+#scoring.py
+
+# ----------------------------
+# Risk Scoring Weights
+# ----------------------------
+W1 = 0.30   # positivity rate
+W2 = 0.25   # spread velocity
+W3 = 0.20   # vulnerability index
+W4 = 0.15   # normalized population
+W5 = 0.10   # disease severity
+
+
+def compute_positivity_rate(tests_done, positive_cases):
+    return positive_cases / tests_done if tests_done > 0 else 0
+
+
+def compute_spread_velocity(positive_cases, last_positive_cases):
+    if last_positive_cases and last_positive_cases > 0:
+        spread_velocity = (
+            (positive_cases - last_positive_cases)
+            / last_positive_cases
+        )
+    else:
+        spread_velocity = 0.0
+
+    return max(spread_velocity, -1.0)
+
+
+def compute_risk_score(positivity_rate, spread_velocity, vulnerability_index,
+                       population, severity_weight):
+
+    normalized_population = population / 10000
+
+    risk_score = (
+        (W1 * positivity_rate) +
+        (W2 * spread_velocity) +
+        (W3 * vulnerability_index) +
+        (W4 * normalized_population) +
+        (W5 * severity_weight)
+    )
+
+    return max(risk_score, 0.0)
@@ -0,0 +1,481 @@
+#seed_data.py
+#
+# Synthetic region generator. Builds a district-scale dataset (villages,
+# outbreak history, mobile units, road segments) deterministically from a
+# seed and bulk-loads it straight into the database.
+#
+#   python seed_data.py --villages 20000 --months 6 --seed 42 --reset
+#   python seed_data.py --villages 5000 --db sqlite:///./synthetic.db --serve
+
+import argparse
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from scoring import compute_positivity_rate, compute_spread_velocity, compute_risk_score
+
+DEFAULT_CENTER = (17.123, 78.456)
+
+DISEASES = [
+    # id, name, severity_weight
+    (1, "Malaria", 1.5),
+    (2, "Dengue", 1.8),
+    (3, "Cholera", 2.0),
+]
+
+NAME_PREFIXES = [
+    "Kotha", "Ram", "Lakshmi", "Shanti", "Rama", "Gopal", "Sita", "Krishna",
+    "Venkat", "Narsa", "Chinna", "Pedda", "Mallik", "Hanuman", "Bhupal", "Surya",
+]
+NAME_SUFFIXES = ["pet", "nagar", "pur", "palli", "gudem", "peta", "wada", "puram"]
+
+ROAD_TYPES = [
+    # road_type, weight, reliability range
+    ("asphalt", 0.30, (0.85, 0.99)),
+    ("gravel", 0.45, (0.60, 0.85)),
+    ("mud", 0.25, (0.30, 0.65)),
+]
+
+REPORTER_TYPES = ["dashboard", "sms", "van"]
+
+KM_PER_DEG_LAT = 110.574
+AREA_PER_VILLAGE_KM2 = 6.0
+VILLAGES_PER_CLUSTER = 60
+CHUNK_SIZE = 10000
+
+
+# ----------------------------
+# Geometry helpers
+# ----------------------------
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def offset_km(lat, lon, dx_km, dy_km):
+    km_per_deg_lon = 111.320 * math.cos(math.radians(lat))
+    return lat + dy_km / KM_PER_DEG_LAT, lon + dx_km / km_per_deg_lon
+
+
+# ----------------------------
+# 1️⃣ Villages
+# ----------------------------
+def generate_villages(rng, count, center_lat, center_lon):
+    """Villages clustered around mandal centres spread over a disk whose
+    area grows with the village count (~6 km² per village)."""
+
+    region_radius_km = math.sqrt(count * AREA_PER_VILLAGE_KM2 / math.pi)
+    cluster_count = max(1, count // VILLAGES_PER_CLUSTER)
+    cluster_sigma_km = math.sqrt(
+        VILLAGES_PER_CLUSTER * AREA_PER_VILLAGE_KM2 / math.pi
+    ) / 2
+
+    clusters = []
+    for _ in range(cluster_count):
+        r = region_radius_km * math.sqrt(rng.random())
+        theta = rng.uniform(0, 2 * math.pi)
+        clusters.append(
+            offset_km(center_lat, center_lon, r * math.cos(theta), r * math.sin(theta))
+        )
+
+    villages = []
+    for village_id in range(1, count + 1):
+        cluster_lat, cluster_lon = rng.choice(clusters)
+        lat, lon = offset_km(
+            cluster_lat, cluster_lon,
+            rng.gauss(0, cluster_sigma_km), rng.gauss(0, cluster_sigma_km)
+        )
+
+        population = int(min(max(rng.lognormvariate(math.log(1500), 0.6), 200), 15000))
+
+        villages.append({
+            "id": village_id,
+            "name": f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES)}-{village_id}",
+            "latitude": round(lat, 6),
+            "longitude": round(lon, 6),
+            "population": population,
+            "vulnerability_index": round(rng.betavariate(2, 3), 2),
+            "last_visit_date": None,
+        })
+
+    return villages
+
+
+# ----------------------------
+# 2️⃣ Outbreak history
+# ----------------------------
+def generate_reports(rng, villages, months, interval_days, end_time):
+    """Yields outbreak report rows village by village, so memory stays flat
+    no matter how long the history is. Scores use the same formula as
+    /ingest."""
+
+    severity = {disease_id: weight for disease_id, _, weight in DISEASES}
+    steps = max(1, (30 * months) // interval_days)
+
+    for village in villages:
+
+        endemic = [d for d, _, _ in DISEASES if rng.random() < 0.5]
+        if not endemic:
+            endemic = [rng.choice(DISEASES)[0]]
+
+        for disease_id in endemic:
+
+            positivity = rng.uniform(0.01, 0.15)
+            outbreak_boost = 1.0
+            last_positive = None
+
+            for step in range(steps):
+
+                # Slow random walk plus occasional outbreak spikes that decay
+                positivity = min(max(positivity * rng.uniform(0.85, 1.15), 0.005), 0.5)
+                if rng.random() < 0.02:
+                    outbreak_boost = rng.uniform(2.0, 5.0)
+                outbreak_boost = max(1.0, outbreak_boost * 0.8)
+
+                tests_done = max(5, int(village["population"] * rng.uniform(0.005, 0.03)))
+                positive_cases = min(
+                    tests_done, int(round(tests_done * positivity * outbreak_boost))
+                )
+
+                positivity_rate = compute_positivity_rate(tests_done, positive_cases)
+                spread_velocity = compute_spread_velocity(positive_cases, last_positive)
+                risk_score = compute_risk_score(
+                    positivity_rate,
+                    spread_velocity,
+                    village["vulnerability_index"],
+                    village["population"],
+                    severity[disease_id]
+                )
+                last_positive = positive_cases
+
+                reporter_type = rng.choices(REPORTER_TYPES, weights=[0.5, 0.3, 0.2])[0]
+                confidence_score = {
+                    "dashboard": 1.0,
+                    "van": 0.9,
+                }.get(reporter_type) or round(rng.uniform(0.6, 0.8), 2)
+
+                # Jitter goes backwards so nothing lands after end_time (and
+                # hides later /ingest reports); the seconds offset keeps each
+                # disease's timestamps distinct, so the latest report per
+                # village is unique
+                report_time = (
+                    end_time
+                    - timedelta(days=(steps - 1 - step) * interval_days)
+                    - timedelta(minutes=rng.randint(0, 24 * 60 - 1), seconds=disease_id)
+                )
+
+                yield {
+                    "village_id": village["id"],
+                    "disease_id": disease_id,
+                    "report_time": report_time,
+                    "tests_done": tests_done,
+                    "positive_cases": positive_cases,
+                    "positivity_rate": positivity_rate,
+                    "spread_velocity": spread_velocity,
+                    "risk_score": risk_score,
+                    "reporter_type": reporter_type,
+                    "confidence_score": confidence_score,
+                }
+
+
+# ----------------------------
+# 3️⃣ Road segments
+# ----------------------------
+def generate_road_segments(rng, villages, neighbours, updated_at):
+    """Connects every village to its nearest neighbours. A coarse lat/lon
+    grid keeps the neighbour search linear in the number of villages.
+    Disconnected clusters are then joined along a spanning tree over their
+    centroids, so the network is always connected."""
+
+    cell_deg = 0.05   # ~5 km
+    grid = {}
+    for v in villages:
+        key = (int(v["latitude"] // cell_deg), int(v["longitude"] // cell_deg))
+        grid.setdefault(key, []).append(v)
+
+    def dist2(a, b):
+        return (a["latitude"] - b["latitude"]) ** 2 + (a["longitude"] - b["longitude"]) ** 2
+
+    pairs = []
+    seen = set()
+
+    def connect(a, b):
+        pair = (min(a["id"], b["id"]), max(a["id"], b["id"]))
+        if pair not in seen:
+            seen.add(pair)
+            pairs.append((a, b))
+
+    for v in villages:
+        cx = int(v["latitude"] // cell_deg)
+        cy = int(v["longitude"] // cell_deg)
+
+        # Grow the search ring until enough candidates are found
+        candidates = []
+        ring = 1
+        while len(candidates) < neighbours and ring <= 8:
+            candidates = [
+                other
+                for dx in range(-ring, ring + 1)
+                for dy in range(-ring, ring + 1)
+                for other in grid.get((cx + dx, cy + dy), ())
+                if other["id"] != v["id"]
+            ]
+            ring += 1
+
+        for other in sorted(candidates, key=lambda o: dist2(o, v))[:neighbours]:
+            connect(v, other)
+
+    for a, b in bridge_components(villages, pairs, dist2):
+        connect(a, b)
+
+    road_weights = [w for _, w, _ in ROAD_TYPES]
+
+    for a, b in pairs:
+        road_type, _, (low, high) = rng.choices(ROAD_TYPES, weights=road_weights)[0]
+        straight_km = haversine_km(
+            a["latitude"], a["longitude"], b["latitude"], b["longitude"]
+        )
+
+        yield {
+            "from_village_id": min(a["id"], b["id"]),
+            "to_village_id": max(a["id"], b["id"]),
+            "distance_km": round(straight_km * rng.uniform(1.2, 1.5), 3),
+            "road_type": road_type,
+            "reliability_score": round(rng.uniform(low, high), 2),
+            "last_updated": updated_at,
+        }
+
+
+def bridge_components(villages, pairs, dist2):
+    """Returns extra (village, village) links that join all connected
+    components: Prim's spanning tree over component centroids, each tree edge
+    linking the two closest-to-each-other villages it can find cheaply."""
+
+    parent = {v["id"]: v["id"] for v in villages}
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs:
+        parent[find(a["id"])] = find(b["id"])
+
+    components = {}
+    for v in villages:
+        components.setdefault(find(v["id"]), []).append(v)
+    groups = sorted(components.values(), key=lambda g: g[0]["id"])   # deterministic order
+
+    if len(groups) < 2:
+        return []
+
+    centroids = [
+        {
+            "latitude": sum(v["latitude"] for v in g) / len(g),
+            "longitude": sum(v["longitude"] for v in g) / len(g),
+        }
+        for g in groups
+    ]
+
+    # Prim's algorithm, O(k²) in the number of components
+    best = {i: (dist2(centroids[0], centroids[i]), 0) for i in range(1, len(groups))}
+    links = []
+
+    while best:
+        i = min(best, key=lambda k: best[k][0])
+        _, j = best.pop(i)
+
+        a = min(groups[i], key=lambda v: dist2(v, centroids[j]))
+        b = min(groups[j], key=lambda v: dist2(v, a))
+        links.append((a, b))
+
+        for k in best:
+            d = dist2(centroids[i], centroids[k])
+            if d < best[k][0]:
+                best[k] = (d, i)
+
+    return links
+
+
+# ----------------------------
+# 4️⃣ Mobile units
+# ----------------------------
+def generate_mobile_units(rng, count):
+    return [
+        {
+            "id": unit_id,
+            "name": f"MU-{unit_id:03d}",
+            "capacity_doctors": rng.randint(1, 4),
+            "capacity_kits": rng.randrange(100, 501, 50),
+            "is_active": rng.random() < 0.9,
+        }
+        for unit_id in range(1, count + 1)
+    ]
+
+
+# ----------------------------
+# Bulk loading
+# ----------------------------
+def bulk_insert(conn, table, rows, chunk_size=CHUNK_SIZE):
+    """executemany() in fixed-size chunks; accepts any iterable of dicts."""
+
+    inserted = 0
+    chunk = []
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.execute(table.insert(), chunk)
+            inserted += len(chunk)
+            chunk = []
+
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        inserted += len(chunk)
+
+    return inserted
+
+
+def generate(engine, villages=1000, months=6, interval_days=7, mobile_units=None,
+             road_neighbours=3, seed=42, end_time=None, reset=False, verbose=True):
+    """Generates and loads a synthetic region. The same seed, sizes and
+    end_time always produce the same rows. Returns row counts per table, or
+    None if the database already holds villages and reset is False."""
+
+    from sqlalchemy import event
+    from models import (
+        Base, Village, Disease, OutbreakReport, RoadSegment,
+        ResourceInventory, MobileUnit,
+    )
+
+    def log(message):
+        if verbose:
+            print(message, flush=True)
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        if conn.execute(Village.__table__.select().limit(1)).first():
+            log("Database already has villages; pass reset=True (--reset) to regenerate.")
+            return None
+
+    if end_time is None:
+        end_time = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    if mobile_units is None:
+        mobile_units = max(5, villages // 200)
+
+    rng = random.Random(seed)
+    counts = {}
+    started = time.perf_counter()
+
+    # SQLite: skip fsync during the load; the data can always be regenerated
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _fast_pragmas(dbapi_conn, _):
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA journal_mode = MEMORY")
+            cursor.close()
+        engine.dispose()
+
+    try:
+        with engine.begin() as conn:
+
+            counts["diseases"] = bulk_insert(conn, Disease.__table__, [
+                {"id": d, "name": name, "severity_weight": weight}
+                for d, name, weight in DISEASES
+            ])
+
+            village_rows = generate_villages(rng, villages, *DEFAULT_CENTER)
+            counts["villages"] = bulk_insert(conn, Village.__table__, village_rows)
+            log(f"villages: {counts['villages']}")
+
+            counts["mobile_units"] = bulk_insert(
+                conn, MobileUnit.__table__, generate_mobile_units(rng, mobile_units)
+            )
+
+            counts["road_segments"] = bulk_insert(
+                conn, RoadSegment.__table__,
+                generate_road_segments(rng, village_rows, road_neighbours, end_time)
+            )
+            log(f"road_segments: {counts['road_segments']}")
+
+            counts["outbreak_reports"] = bulk_insert(
+                conn, OutbreakReport.__table__,
+                generate_reports(rng, village_rows, months, interval_days, end_time)
+            )
+            log(f"outbreak_reports: {counts['outbreak_reports']}")
+
+            # Scale the shared inventory with the region
+            doctors = max(6, villages // 10)
+            counts["resource_inventory"] = bulk_insert(conn, ResourceInventory.__table__, [{
+                "doctors_available": doctors,
+                "nurses_available": max(4, villages // 15),
+                "malaria_kits": doctors * 50,
+                "dengue_kits": doctors * 35,
+                "cholera_kits": doctors * 25,
+                "vaccines": doctors * 80,
+                "last_updated": end_time,
+            }])
+    finally:
+        if engine.dialect.name == "sqlite":
+            event.remove(engine, "connect", _fast_pragmas)
+            engine.dispose()
+
+    log(f"Generated in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic health logistics region")
+    parser.add_argument("--db", help="Database URL (default: DATABASE_URL or sqlite:///./health.db)")
+    parser.add_argument("--villages", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=6, help="Months of outbreak history")
+    parser.add_argument("--interval-days", type=int, default=7, help="Days between reports")
+    parser.add_argument("--mobile-units", type=int, help="Default: one per 200 villages (min 5)")
+    parser.add_argument("--road-neighbours", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="History ends at 00:00 of this day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    parser.add_argument("--serve", action="store_true", help="Start the API on the generated database")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    # Must be set before database.py is imported so the app picks it up too
+    if args.db:
+        os.environ["DATABASE_URL"] = args.db
+
+    from database import engine
+
+    generate(
+        engine,
+        villages=args.villages,
+        months=args.months,
+        interval_days=args.interval_days,
+        mobile_units=args.mobile_units,
+        road_neighbours=args.road_neighbours,
+        seed=args.seed,
+        end_time=datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None,
+        reset=args.reset,
+    )
+
+    if args.serve:
+        import uvicorn
+        uvicorn.run("app:app", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()